@@ -32,12 +32,48 @@ Expected: 4-6 signals/day | 75-82% win rate
 """
 
 
+import time
+
+STARTED_AT = time.perf_counter()                        # before any other import, so startup timing covers them
+
 import requests
-import pandas as pd
-import numpy as np
 import datetime as dt
-import time
 import csv
+import abc
+import collections
+import importlib
+import json
+import queue
+import threading
+import os
+import sys
+import glob
+import concurrent.futures
+import array
+import bisect
+import struct
+import zlib
+
+
+class LazyModule:
+    """Module proxy that imports on first attribute access"""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr):
+        return getattr(self.warm(), attr)
+    
+    def warm(self):
+        """Import the module now (e.g. to warm it up on a background thread)"""
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+
+# NumPy is only needed for the position book and analytics/backtests. Importing it lazily keeps it off
+# the path to the first decision; a live run still imports it, warmed on a background thread after init
+np = LazyModule("numpy")
 
 
 # ==================== CONFIGURATION ====================
@@ -56,68 +92,537 @@ LOT_SIZE = 75           # Nifty 50 lot size
 TAKE_PROFIT = 1500      # ₹1500 total profit
 STOP_LOSS = 2000        # ₹2000 total loss
 TRAILING_STOP = 500     # Trail by ₹500 after TP
+
+
+# EVENT LOGGING
+EVENT_LOG_FILE = "nifty_events.jsonl"
+LOG_LEVEL = "DEBUG"        # Minimum level recorded to the JSON lines file
+CONSOLE_LEVEL = "INFO"     # Minimum level rendered on the console
+CONSOLE_THROTTLE = 300     # Seconds between repeated console views of the same event (loop runs every 60s)
+
+
+# CHAIN ARCHIVE
+CHAIN_ARCHIVE_FILE = "nifty_chain.nca"
+CHAIN_ARCHIVE_CHUNK = 30   # Snapshots per compressed chunk
 # =======================================================
 
 
-last_signal_time = None
 current_expiry_date = None
 contracts_cache = []
-open_position = None
+
+
+
+# ==================== EVENT LOGGING ====================
+
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+
+
+class EventLogger:
+    """Structured event logger: JSON lines file + throttled console view, written on a background thread"""
+    def __init__(self, path, level=LOG_LEVEL, console_level=CONSOLE_LEVEL, throttle=CONSOLE_THROTTLE):
+        self.path = path
+        self.level = LOG_LEVELS[level]
+        self.console_level = LOG_LEVELS[console_level]
+        self.throttle = throttle
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.file = None
+        self.last_rendered = {}
+    
+    def emit(self, event_type, **fields):
+        """Enqueue an event - filtering, serialization and rendering happen off the trading thread"""
+        self.queue.put((time.time(), event_type, fields))
+    
+    def start(self):
+        """Open the JSON lines file on the caller's thread and start the background writer"""
+        if self.thread is not None:
+            return
+        
+        try:
+            self.file = open(self.path, "w", encoding="utf-8")
+        except OSError as e:
+            self.file = None
+            print(f"  ⚠️  Cannot open {self.path} ({e}) - events will only be shown on the console")
+        
+        self.thread = threading.Thread(target=self._run, name="event-logger", daemon=True)
+        self.thread.start()
+    
+    def close(self):
+        """Drain pending events and stop the background writer"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout=10)
+            self.thread = None
+        
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+    
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            
+            try:
+                self._handle(self.file, *item)
+            except Exception as e:
+                print(f"  ⚠️  Event logging failed: {e}")
+            
+            if self.file is not None and self.queue.empty():
+                self.file.flush()
+    
+    def _handle(self, f, ts, event_type, fields):
+        level_name, renderer, throttled = EVENT_TYPES[event_type]
+        level = LOG_LEVELS[level_name]
+        
+        if f is not None and level >= self.level:
+            record = {
+                "ts": dt.datetime.fromtimestamp(ts).isoformat(timespec="milliseconds"),
+                "type": event_type,
+                "level": level_name
+            }
+            record.update(fields)
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        
+        if level >= self.console_level:
+            if throttled:
+                key = (event_type, fields.get("strategy"))
+                if ts - self.last_rendered.get(key, 0) < self.throttle:
+                    return
+                self.last_rendered[key] = ts
+            
+            print(renderer(fields) if callable(renderer) else renderer.format(**fields))
+
+
+event_log = EventLogger(EVENT_LOG_FILE)
+
+
+def log_event(event_type, **fields):
+    """Log a typed event (see EVENT_TYPES)"""
+    event_log.emit(event_type, **fields)
+
+
+
+# ==================== CHAIN ARCHIVE ====================
+
+
+# Chunk header: magic, snapshots, instruments, first/last timestamp (epoch ms), payload bytes
+CHUNK_HEADER = struct.Struct("<4sIIqqI")
+CHUNK_MAGIC = b"NCA1"
+CHAIN_FIELDS = 3  # LTP (paise), OI, volume
+
+
+def _to_epoch_ms(ts):
+    """Epoch milliseconds from a datetime or a number"""
+    if isinstance(ts, dt.datetime):
+        return int(ts.timestamp() * 1000)
+    return int(ts)
+
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+
+class ChainSnapshot:
+    """One reconstructed option-chain snapshot; quotes mirror the Upstox quote shape"""
+    def __init__(self, ts_ms, keys, row):
+        self.ts_ms = ts_ms
+        self.timestamp = dt.datetime.fromtimestamp(ts_ms / 1000)
+        self.quotes = {
+            key: {"last_price": row[i * CHAIN_FIELDS] / 100,
+                  "oi": row[i * CHAIN_FIELDS + 1],
+                  "volume": row[i * CHAIN_FIELDS + 2]}
+            for i, key in enumerate(keys)
+        }
+
+
+
+class ChainArchiveWriter:
+    """Appends chain snapshots as integer-scaled, delta-encoded, zlib-compressed chunks"""
+    def __init__(self, path, chunk_size=CHAIN_ARCHIVE_CHUNK):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.file = None
+        self.keys = []
+        self.index = {}
+        self.last = {}
+        self.pending = []
+    
+    def open(self):
+        """Start a new archive for this session"""
+        if self.file is None:
+            self.file = open(self.path, "wb")
+    
+    def close(self):
+        """Flush the last partial chunk and close the archive"""
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+    
+    def record(self, quotes, ts=None):
+        """Archive a quote payload - failures are logged and never reach the trading path"""
+        if self.file is None:
+            return
+        
+        try:
+            self._record(quotes, ts)
+        except Exception as e:
+            log_event("archive_error", error=str(e))
+    
+    def _record(self, quotes, ts):
+        """Instruments or fields missing from the payload carry their last values forward"""
+        new_keys = [k for k in quotes if k not in self.index]
+        if new_keys:
+            # Every chunk holds a fixed instrument set, so start a new one
+            self.flush()
+            for key in new_keys:
+                self.index[key] = len(self.keys)
+                self.keys.append(key)
+        
+        row = []
+        for key in self.keys:
+            prev = self.last.get(key, (0, 0, 0))
+            quote = quotes.get(key)
+            if quote is not None:
+                ltp, oi, volume = quote_premium(quote), quote.get("oi"), quote.get("volume")
+                prev = (prev[0] if ltp is None else round(ltp * 100),
+                        prev[1] if oi is None else int(oi),
+                        prev[2] if volume is None else int(volume))
+                self.last[key] = prev
+            row.extend(prev)
+        
+        self.pending.append((_to_epoch_ms(time.time() * 1000 if ts is None else ts), row))
+        
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+    
+    def flush(self):
+        """Encode pending snapshots as one chunk: first row absolute, later rows as deltas"""
+        if not self.pending or self.file is None:
+            return
+        
+        width = len(self.keys) * CHAIN_FIELDS
+        timestamps = array.array("q", [ts for ts, _ in self.pending])
+        values = array.array("q")
+        
+        prev = [0] * width
+        for _, row in self.pending:
+            values.extend(v - p for v, p in zip(row, prev))
+            prev = row
+        
+        keys_blob = "\n".join(self.keys).encode("utf-8")
+        payload = zlib.compress(
+            struct.pack("<I", len(keys_blob)) + keys_blob
+            + _little_endian(timestamps).tobytes() + _little_endian(values).tobytes()
+        )
+        
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(self.pending), len(self.keys),
+                                          self.pending[0][0], self.pending[-1][0], len(payload)))
+        self.file.write(payload)
+        self.file.flush()
+        self.pending = []
+
+
+
+class ChainArchiveReader:
+    """Random access and range replay over a chain archive - only the chunks touched are decoded"""
+    def __init__(self, path):
+        self.path = path
+        self.chunks = []
+        
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(CHUNK_HEADER.size)
+                if len(header) < CHUNK_HEADER.size:
+                    break
+                
+                magic, count, n_keys, first_ts, last_ts, length = CHUNK_HEADER.unpack(header)
+                if magic != CHUNK_MAGIC:
+                    raise ValueError(f"{path}: not a chain archive chunk at offset {f.tell() - CHUNK_HEADER.size}")
+                
+                self.chunks.append((first_ts, last_ts, count, n_keys, f.tell(), length))
+                f.seek(length, 1)
+        
+        self.first_ts = [c[0] for c in self.chunks]
+    
+    def __len__(self):
+        return sum(c[2] for c in self.chunks)
+    
+    def _decode(self, i):
+        """Decode chunk i into (keys, timestamps, rows)"""
+        first_ts, last_ts, count, n_keys, offset, length = self.chunks[i]
+        
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            raw = zlib.decompress(f.read(length))
+        
+        keys_len = struct.unpack_from("<I", raw)[0]
+        keys = raw[4:4 + keys_len].decode("utf-8").split("\n") if n_keys else []
+        
+        ints = _little_endian(array.array("q", raw[4 + keys_len:]))
+        timestamps = ints[:count]
+        width = n_keys * CHAIN_FIELDS
+        
+        rows = []
+        prev = [0] * width
+        for r in range(count):
+            prev = [p + d for p, d in zip(prev, ints[count + r * width:count + (r + 1) * width])]
+            rows.append(prev)
+        
+        return keys, timestamps, rows
+    
+    def snapshot_at(self, ts):
+        """Latest snapshot at or before ts (datetime or epoch ms), or None"""
+        ts_ms = _to_epoch_ms(ts)
+        i = bisect.bisect_right(self.first_ts, ts_ms) - 1
+        if i < 0:
+            return None
+        
+        keys, timestamps, rows = self._decode(i)
+        j = bisect.bisect_right(timestamps, ts_ms) - 1
+        return ChainSnapshot(timestamps[j], keys, rows[j])
+    
+    def iter_range(self, start=None, end=None):
+        """Yield snapshots with start <= timestamp <= end, in order"""
+        start_ms = _to_epoch_ms(start) if start is not None else None
+        end_ms = _to_epoch_ms(end) if end is not None else None
+        
+        for i, (first_ts, last_ts, *_) in enumerate(self.chunks):
+            if (start_ms is not None and last_ts < start_ms) or (end_ms is not None and first_ts > end_ms):
+                continue
+            
+            keys, timestamps, rows = self._decode(i)
+            for ts_ms, row in zip(timestamps, rows):
+                if (start_ms is None or ts_ms >= start_ms) and (end_ms is None or ts_ms <= end_ms):
+                    yield ChainSnapshot(ts_ms, keys, row)
+
+
+chain_archive = ChainArchiveWriter(CHAIN_ARCHIVE_FILE)
 
 
 
 # ==================== POSITION TRACKING ====================
 
 
-class Position:
-    def __init__(self, signal_type, strike, entry_premium, instrument_key, timestamp):
-        self.signal_type = signal_type
-        self.strike = strike
-        self.entry_premium = entry_premium
-        self.instrument_key = instrument_key
-        self.timestamp = timestamp
-        self.lot_size = LOT_SIZE
-        self.highest_pnl = 0
-        self.trailing_stop_active = False
-        self.trailing_stop_price = None
+EXIT_NONE, EXIT_STOP_LOSS, EXIT_TRAILING_STOP = 0, 1, 2
+
+
+def format_exit_reason(exit_code, pnl):
+    """Exit reason text as logged to CSV/Discord"""
+    if exit_code == EXIT_STOP_LOSS:
+        return f"STOP LOSS (Loss: ₹{abs(pnl):.2f})"
+    return f"TRAILING STOP (Profit: ₹{pnl:.2f})"
+
+
+
+class PositionBook:
+    """Open positions stored as struct-of-arrays; exits for all of them are evaluated in one vectorized pass"""
+    def __init__(self, capacity=8):
+        self.initial_capacity = capacity
+        self.capacity = 0
+        self.entry_premium = None
+        self.lot_size = None
+        self.side = None                                # +1 bought option, -1 sold option
+        self.highest_pnl = None
+        self.trailing_active = None
+        self.trailing_stop = None
+        self.is_open = None
+        self.signal_type = []
+        self.strike = []
+        self.instrument_key = []
+        self.timestamp = []
     
-    def calculate_pnl(self, current_premium):
-        """Calculate P&L: (Current - Entry) × 75"""
-        premium_diff = current_premium - self.entry_premium
-        pnl = premium_diff * self.lot_size
+    def reserve(self, capacity):
+        """Grow the arrays to hold at least `capacity` slots - nothing is allocated until the first position"""
+        if capacity <= self.capacity:
+            return
         
-        if pnl > self.highest_pnl:
-            self.highest_pnl = pnl
+        extra = capacity - self.capacity
+        columns = {
+            "entry_premium": np.zeros(extra),
+            "lot_size": np.full(extra, float(LOT_SIZE)),
+            "side": np.ones(extra),
+            "highest_pnl": np.zeros(extra),
+            "trailing_active": np.zeros(extra, dtype=bool),
+            "trailing_stop": np.full(extra, np.nan),
+            "is_open": np.zeros(extra, dtype=bool)
+        }
+        for name, fill in columns.items():
+            current = getattr(self, name)
+            setattr(self, name, fill if current is None else np.concatenate((current, fill)))
+        
+        for column in (self.signal_type, self.strike, self.instrument_key, self.timestamp):
+            column.extend([None] * extra)
+        self.capacity = capacity
+    
+    def open(self, signal_type, strike, entry_premium, instrument_key, timestamp, lot_size=LOT_SIZE, side=1):
+        """Add a position and return its slot"""
+        free = np.flatnonzero(~self.is_open) if self.capacity else []
+        if len(free) == 0:
+            slot = self.capacity
+            self.reserve(max(self.capacity * 2, self.initial_capacity, 1))
+        else:
+            slot = int(free[0])
+        
+        self.entry_premium[slot] = entry_premium
+        self.lot_size[slot] = lot_size
+        self.side[slot] = side
+        self.highest_pnl[slot] = 0
+        self.trailing_active[slot] = False
+        self.trailing_stop[slot] = np.nan
+        self.is_open[slot] = True
+        self.signal_type[slot] = signal_type
+        self.strike[slot] = strike
+        self.instrument_key[slot] = instrument_key
+        self.timestamp[slot] = timestamp
+        return slot
+    
+    def close(self, slot):
+        """Free a slot"""
+        self.is_open[slot] = False
+    
+    def premium_vector(self, premiums_by_slot):
+        """Premium array for evaluate(); slots without an update are NaN and left untouched"""
+        premiums = np.full(self.capacity, np.nan)
+        for slot, premium in premiums_by_slot.items():
+            if premium:
+                premiums[slot] = premium
+        return premiums
+    
+    def calculate_pnl(self, premiums):
+        """P&L per slot: (Current - Entry) × lot × side; tracks the highest P&L"""
+        premiums = np.asarray(premiums, dtype=float)
+        premium_diff = premiums - self.entry_premium
+        pnl = self.side * premium_diff * self.lot_size
+        
+        live = self.is_open & ~np.isnan(premiums)
+        np.maximum(self.highest_pnl, pnl, out=self.highest_pnl, where=live)
         
         return pnl, premium_diff
     
-    def check_exit(self, current_premium):
-        """Check exit conditions"""
-        pnl, premium_diff = self.calculate_pnl(current_premium)
+    def evaluate(self, premiums):
+        """Stop loss, take profit (arms trailing) and trailing stop for every open slot at once.
+        
+        Returns (exit_codes, pnl, premium_diff, trailing_activated, trailing_updated).
+        """
+        premiums = np.asarray(premiums, dtype=float)
+        pnl, premium_diff = self.calculate_pnl(premiums)
+        live = self.is_open & ~np.isnan(premiums)
         
         # Stop Loss
-        if pnl <= -STOP_LOSS:
-            return True, f"STOP LOSS (Loss: ₹{abs(pnl):.2f})", pnl, premium_diff
+        stop_loss = live & (pnl <= -STOP_LOSS)
+        running = live & ~stop_loss
         
         # Take Profit - activate trailing
-        if pnl >= TAKE_PROFIT:
-            if not self.trailing_stop_active:
-                self.trailing_stop_active = True
-                self.trailing_stop_price = current_premium - (TRAILING_STOP / self.lot_size)
-                print(f"  🎯 Take Profit reached! Trailing stop: ₹{self.trailing_stop_price:.2f}")
+        new_trail = premiums - self.side * (TRAILING_STOP / self.lot_size)
+        activated = running & (pnl >= TAKE_PROFIT) & ~self.trailing_active
+        self.trailing_active |= activated
+        self.trailing_stop = np.where(activated, new_trail, self.trailing_stop)
         
         # Trailing Stop
-        if self.trailing_stop_active:
-            if current_premium <= self.trailing_stop_price:
-                return True, f"TRAILING STOP (Profit: ₹{pnl:.2f})", pnl, premium_diff
-            
-            # Update trailing stop
-            new_trail = current_premium - (TRAILING_STOP / self.lot_size)
-            if new_trail > self.trailing_stop_price:
-                self.trailing_stop_price = new_trail
-                print(f"  📈 Trailing stop updated: ₹{self.trailing_stop_price:.2f}")
+        trailing = running & self.trailing_active
+        trail_hit = trailing & (self.side * (premiums - self.trailing_stop) <= 0)
         
-        return False, None, pnl, premium_diff
+        # Update trailing stop
+        updated = trailing & ~trail_hit & (self.side * (new_trail - self.trailing_stop) > 0)
+        self.trailing_stop = np.where(updated, new_trail, self.trailing_stop)
+        
+        exit_codes = np.where(stop_loss, EXIT_STOP_LOSS, np.where(trail_hit, EXIT_TRAILING_STOP, EXIT_NONE))
+        return exit_codes, pnl, premium_diff, activated, updated
+
+
+
+def _first_tick(mask, ticks):
+    """Index of the first True along the time axis per column, `ticks` where there is none"""
+    return np.where(mask.any(axis=0), mask.argmax(axis=0), ticks)
+
+
+def backtest_exits(entry_premiums, premium_paths, lot_size=LOT_SIZE, side=1):
+    """Replay premium paths (ticks × positions) with the same rules as PositionBook.evaluate, vectorized over time.
+    
+    NaN premiums are ticks without a quote. Returns per position the exit tick (-1 if still open),
+    exit code and P&L at exit (or at the last quoted tick).
+    """
+    n = len(entry_premiums)
+    premiums = np.asarray(premium_paths, dtype=float).reshape(-1, n) if n else np.zeros((0, 0))
+    ticks = len(premiums)
+    if n == 0 or ticks == 0:
+        return np.full(n, -1), np.zeros(n, dtype=int), np.zeros(n)
+    
+    entry = np.asarray(entry_premiums, dtype=float)
+    lot_size = np.broadcast_to(np.asarray(lot_size, dtype=float), (n,))
+    side = np.broadcast_to(np.asarray(side, dtype=float), (n,))
+    
+    pnl = side * (premiums - entry) * lot_size
+    live = ~np.isnan(premiums)
+    
+    # Stop Loss - first crossing
+    stop_loss_tick = _first_tick(live & (pnl <= -STOP_LOSS), ticks)
+    
+    # Take Profit arms the trailing stop; from then on the stop ratchets with the best premium
+    # (in the position's direction), so the level is a running max of premium - trail distance
+    arm_tick = _first_tick(live & (pnl >= TAKE_PROFIT), ticks)
+    armed = live & (np.arange(ticks)[:, None] >= arm_tick)
+    directed = side * premiums
+    level = np.maximum.accumulate(np.where(armed, directed - TRAILING_STOP / lot_size, -np.inf), axis=0)
+    trailing_tick = _first_tick(armed & (directed <= level), ticks)
+    
+    exit_at = np.minimum(stop_loss_tick, trailing_tick)
+    exited = exit_at < ticks
+    exit_codes = np.where(~exited, EXIT_NONE, np.where(stop_loss_tick <= trailing_tick, EXIT_STOP_LOSS, EXIT_TRAILING_STOP))
+    
+    # P&L at exit, otherwise at the last quoted tick (0 if never quoted)
+    last_quoted = ticks - 1 - _first_tick(live[::-1], ticks)
+    at = np.where(exited, exit_at, last_quoted)
+    final_pnl = np.where(at >= 0, pnl[np.maximum(at, 0), np.arange(n)], 0.0)
+    
+    return np.where(exited, exit_at, -1), exit_codes, final_pnl
+
+
+def check_backtest_exits(paths=500, ticks=150, seed=0):
+    """Parity check: backtest_exits against a tick-by-tick replay through PositionBook.evaluate"""
+    rng = np.random.default_rng(seed)
+    entry = rng.uniform(50, 250, paths)
+    side = rng.choice([-1.0, 1.0], paths)
+    lot_size = rng.choice([float(LOT_SIZE), 25.0, 50.0], paths)
+    steps = rng.normal(0, 1.5, (ticks, paths)) * rng.uniform(0.2, 3, paths)
+    premium_paths = np.maximum(entry + np.cumsum(steps, axis=0), 0.05)
+    premium_paths[rng.random((ticks, paths)) < 0.05] = np.nan
+    
+    book = PositionBook(paths)
+    book.reserve(paths)
+    book.entry_premium[:] = entry
+    book.lot_size[:] = lot_size
+    book.side[:] = side
+    book.is_open[:] = True
+    
+    exit_tick = np.full(paths, -1)
+    exit_codes = np.zeros(paths, dtype=int)
+    final_pnl = np.zeros(paths)
+    for tick, premiums in enumerate(premium_paths):
+        codes, pnl, _, _, _ = book.evaluate(premiums)
+        live = ~np.isnan(pnl) & book.is_open
+        final_pnl[live] = pnl[live]
+        exited = codes != EXIT_NONE
+        exit_tick[exited] = tick
+        exit_codes[exited] = codes[exited]
+        book.is_open[exited] = False
+    
+    got_tick, got_codes, got_pnl = backtest_exits(entry, premium_paths, lot_size, side)
+    mismatches = int(np.sum((got_tick != exit_tick) | (got_codes != exit_codes) | (got_pnl != final_pnl)))
+    exits = int(np.sum(exit_codes != EXIT_NONE))
+    print(f"backtest_exits parity: {paths - mismatches}/{paths} paths match ({exits} exits, {mismatches} mismatches)")
+    return mismatches == 0
+
+
+position_book = PositionBook()
 
 
 
@@ -143,7 +648,7 @@ def send_discord_alert(title, description, color=0x00ff00, fields=None):
     try:
         response = requests.post(DISCORD_WEBHOOK_URL, json={"embeds": [embed]}, timeout=10)
         if response.status_code == 204:
-            print("  ✅ Discord alert sent")
+            log_event("discord_sent", title=title)
     except:
         pass
 
@@ -221,23 +726,25 @@ def fetch_live_spot_candles(symbol):
         if len(candles) == 0:
             return None
         
-        df = pd.DataFrame(candles, columns=["time", "open", "high", "low", "close", "volume", "oi"])
-        df["time"] = pd.to_datetime(df["time"])
-        df["volume"] = df["volume"].replace(0, 1)
-        df = df.sort_values("time").reset_index(drop=True)
+        bars = []
         
-        df.set_index("time", inplace=True)
-        df_5min = df.resample('5min').agg({
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last',
-            'volume': 'sum'
-        }).dropna()
-        df_5min.reset_index(inplace=True)
+        for candle in sorted(candles, key=lambda c: dt.datetime.fromisoformat(c[0])):
+            t = dt.datetime.fromisoformat(candle[0])
+            bucket = t.replace(minute=t.minute - t.minute % 5, second=0, microsecond=0)
+            volume = candle[5] or 1
+            
+            if bars and bars[-1]["time"] == bucket:
+                bar = bars[-1]
+                bar["high"] = max(bar["high"], candle[2])
+                bar["low"] = min(bar["low"], candle[3])
+                bar["close"] = candle[4]
+                bar["volume"] += volume
+            else:
+                bars.append({"time": bucket, "open": candle[1], "high": candle[2],
+                             "low": candle[3], "close": candle[4], "volume": volume})
         
-        print(f"  ✅ Fetched {len(candles)} 1-min → {len(df_5min)} 5-min candles")
-        return df_5min
+        log_event("candles_fetched", raw=len(candles), bars=len(bars))
+        return bars
         
     except:
         return None
@@ -321,13 +828,9 @@ def get_spot_price():
 
 
 
-def get_live_oi_from_quotes(instrument_keys):
-    """Get live OI"""
-    if not instrument_keys:
-        return None, 0, 0
-    
-    ce_oi_total = 0
-    pe_oi_total = 0
+def fetch_chain_quotes(instrument_keys, archive=True):
+    """Fetch full quotes for the option chain (instrument_key -> quote)"""
+    quotes = {}
     
     for i in range(0, len(instrument_keys), 100):
         batch = instrument_keys[i:i+100]
@@ -348,18 +851,33 @@ def get_live_oi_from_quotes(instrument_keys):
             data = response.json()
             
             if "data" in data:
-                for instrument_key, quote_data in data["data"].items():
-                    if "oi" in quote_data:
-                        oi_value = quote_data["oi"]
-                        
-                        if "CE" in instrument_key:
-                            ce_oi_total += oi_value
-                        elif "PE" in instrument_key:
-                            pe_oi_total += oi_value
+                quotes.update(data["data"])
         
         except:
             continue
     
+    # Only full chain polls are archived - partial fetches would be stored as stale full-width rows
+    if quotes and archive:
+        chain_archive.record(quotes)
+    
+    return quotes
+
+
+
+def summarize_oi(quotes):
+    """Sum CE/PE OI over chain quotes and classify the OI trend"""
+    ce_oi_total = 0
+    pe_oi_total = 0
+    
+    for instrument_key, quote_data in quotes.items():
+        if "oi" in quote_data:
+            oi_value = quote_data["oi"]
+            
+            if "CE" in instrument_key:
+                ce_oi_total += oi_value
+            elif "PE" in instrument_key:
+                pe_oi_total += oi_value
+    
     if ce_oi_total == 0 and pe_oi_total == 0:
         return None, 0, 0
     
@@ -377,32 +895,46 @@ def get_live_oi_from_quotes(instrument_keys):
 # ==================== INDICATORS ====================
 
 
-def calculate_vwap_rsi(df):
-    """Calculate VWAP and RSI"""
-    df["TP"] = (df["high"] + df["low"] + df["close"]) / 3
-    df["TPV"] = df["TP"] * df["volume"]
-    df["Cumulative_TPV"] = df["TPV"].cumsum()
-    df["Cumulative_Volume"] = df["volume"].cumsum()
-    df["VWAP"] = df["Cumulative_TPV"] / df["Cumulative_Volume"]
-    
-    delta = df["close"].diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=14, min_periods=1).mean()
-    avg_loss = loss.rolling(window=14, min_periods=1).mean()
-    rs = np.where(avg_loss > 0, avg_gain / avg_loss, 0)
-    df["RSI"] = 100 - (100 / (1 + rs))
+def calculate_vwap_rsi(bars, period=14):
+    """Calculate VWAP (cumulative) and RSI (rolling mean of gains/losses) on each bar"""
+    cumulative_tpv = 0.0
+    cumulative_volume = 0.0
+    gains = collections.deque(maxlen=period)
+    losses = collections.deque(maxlen=period)
+    prev_close = None
     
-    df["VWAP"] = df["VWAP"].fillna(df["close"])
-    df["RSI"] = df["RSI"].fillna(50)
+    for bar in bars:
+        tp = (bar["high"] + bar["low"] + bar["close"]) / 3
+        cumulative_tpv += tp * bar["volume"]
+        cumulative_volume += bar["volume"]
+        bar["VWAP"] = cumulative_tpv / cumulative_volume if cumulative_volume else bar["close"]
+        
+        delta = 0.0 if prev_close is None else bar["close"] - prev_close
+        gains.append(delta if delta > 0 else 0.0)
+        losses.append(-delta if delta < 0 else 0.0)
+        prev_close = bar["close"]
+        
+        avg_gain = sum(gains) / len(gains)
+        avg_loss = sum(losses) / len(losses)
+        rs = avg_gain / avg_loss if avg_loss > 0 else 0
+        bar["RSI"] = 100 - (100 / (1 + rs))
     
-    return df
+    return bars
 
 
 
 # ==================== STRIKE & PREMIUM ====================
 
 
+def quote_premium(quote):
+    """Extract LTP from a quote payload"""
+    premium = quote.get("last_price", 0)
+    if premium == 0:
+        premium = quote.get("ltp", 0)
+    return premium
+
+
+
 def get_current_premium(instrument_key):
     """Get current premium"""
     quote_url = f"https://api.upstox.com/v2/market-quote/quotes?instrument_key={instrument_key}"
@@ -416,11 +948,7 @@ def get_current_premium(instrument_key):
             
             if "data" in quote_data:
                 for key in quote_data["data"]:
-                    data_item = quote_data["data"][key]
-                    premium = data_item.get("last_price", 0)
-                    if premium == 0:
-                        premium = data_item.get("ltp", 0)
-                    return premium
+                    return quote_premium(quote_data["data"][key])
         
         return None
     except:
@@ -428,7 +956,7 @@ def get_current_premium(instrument_key):
 
 
 
-def find_atm_strike_and_premium(spot_price, option_type):
+def find_atm_strike_and_premium(spot_price, option_type, get_premium=get_current_premium):
     """Find ATM strike and premium"""
     global contracts_cache, current_expiry_date
     
@@ -442,7 +970,7 @@ def find_atm_strike_and_premium(spot_price, option_type):
         atm_strike = atm_contract["strike_price"]
         instrument_key = atm_contract["instrument_key"]
         
-        premium = get_current_premium(instrument_key)
+        premium = get_premium(instrument_key)
         
         if premium:
             return atm_strike, premium, instrument_key
@@ -484,84 +1012,309 @@ def check_signal_conditions(spot, day_open, vwap, rsi, oi_trend):
 
 
 
+# ==================== MARKET SNAPSHOT ====================
+
+
+class MarketSnapshot:
+    """Per-tick market state - fetched and computed once, shared by every strategy"""
+    def __init__(self, now):
+        self.now = now
+        self.timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+        self.bars = None
+        self.spot = None
+        self.day_open = None
+        self.vwap = None
+        self.rsi = None
+        self.oi_trend = "Unknown"
+        self.oi_ce = 0
+        self.oi_pe = 0
+        self.quotes = {}
+        self.quotes_by_token = {}
+        self.premium_cache = {}
+    
+    @property
+    def loaded(self):
+        return self.bars is not None
+    
+    def load(self, option_instruments, bars=None):
+        """Fetch candles, indicators and chain quotes once for this tick (bars may be prefetched)"""
+        if self.loaded:
+            return True
+        
+        if not bars:
+            bars = fetch_live_spot_candles(NIFTY_SYMBOL)
+        if not bars:
+            return False
+        
+        self.bars = calculate_vwap_rsi(bars)
+        
+        latest = self.bars[-1]
+        self.spot = float(latest["close"])
+        self.day_open = float(self.bars[0]["open"])
+        self.vwap = float(latest["VWAP"])
+        self.rsi = float(latest["RSI"])
+        
+        log_event("indicators", spot=self.spot, vwap=self.vwap, rsi=self.rsi)
+        
+        self.quotes = fetch_chain_quotes(option_instruments) if option_instruments else {}
+        self.quotes_by_token = {q.get("instrument_token", k): q for k, q in self.quotes.items()}
+        oi_trend, oi_ce, oi_pe = summarize_oi(self.quotes)
+        
+        if oi_trend is not None:
+            self.oi_trend, self.oi_ce, self.oi_pe = oi_trend, oi_ce, oi_pe
+            log_event("oi_fetched", oi_trend=oi_trend, oi_ce=oi_ce, oi_pe=oi_pe)
+        
+        return True
+    
+    def premiums(self, instrument_keys):
+        """Premiums for several instruments - from this tick's chain quotes, the rest in one batched quote fetch"""
+        missing = [k for k in instrument_keys if k not in self.premium_cache and k not in self.quotes_by_token]
+        
+        if missing:
+            quotes = fetch_chain_quotes(missing, archive=False)
+            by_token = {q.get("instrument_token", k): q for k, q in quotes.items()}
+            if len(missing) == 1 and len(quotes) == 1 and missing[0] not in by_token:
+                by_token = {missing[0]: next(iter(quotes.values()))}
+            self.quotes_by_token.update(by_token)
+        
+        for key in instrument_keys:
+            if key not in self.premium_cache and key in self.quotes_by_token:
+                premium = quote_premium(self.quotes_by_token[key])
+                if premium:
+                    self.premium_cache[key] = premium
+        
+        return {key: self.premium_cache.get(key) for key in instrument_keys}
+    
+    def premium(self, instrument_key):
+        """Premium for one instrument (see premiums)"""
+        return self.premiums([instrument_key])[instrument_key]
+
+
+
+# ==================== STRATEGIES ====================
+
+
+class Strategy(abc.ABC):
+    """Base strategy: owns its position and cooldown, decides from the shared MarketSnapshot"""
+    name = "base"
+    cooldown = SIGNAL_COOLDOWN
+    
+    def __init__(self, name=None):
+        if name:
+            self.name = name
+        self.position = None          # Slot in position_book
+        self.last_signal_time = None
+    
+    def cooldown_remaining(self, now):
+        """Seconds left before this strategy may signal again"""
+        if not self.last_signal_time:
+            return 0
+        elapsed = (now - self.last_signal_time).seconds
+        return max(self.cooldown - elapsed, 0)
+    
+    @abc.abstractmethod
+    def evaluate(self, snapshot):
+        """Return (signal, conditions) - signal is "BUY CE", "BUY PE" or None"""
+
+
+
+class OpenVwapRsiOiStrategy(Strategy):
+    """Day's Open + VWAP + RSI + OI confirmation"""
+    name = "open_vwap_rsi_oi"
+    
+    def evaluate(self, snapshot):
+        return check_signal_conditions(snapshot.spot, snapshot.day_open, snapshot.vwap,
+                                       snapshot.rsi, snapshot.oi_trend)
+
+
+
+# Every strategy listed here runs on the same per-tick snapshot
+STRATEGIES = [
+    OpenVwapRsiOiStrategy()
+]
+
+
+
 # ==================== DISPLAY ====================
 
 
-def print_startup_banner():
-    """Print startup banner"""
-    print("\n" + "=" * 85)
-    print("🚀 NIFTY 50 OPTIONS INTRADAY TRADING BOT")
-    print("=" * 85)
-    print("Strategy:    Day's Open + VWAP + RSI + OI Confirmation")
-    print("Timeframe:   5-Minute Candles (1-min resampled)")
-    print("Data Source: Live from NSE via Upstox API")
-    print("Target:      75-82% Win Rate | 4-6 Signals/Day")
-    print(f"Log File:    {CSV_FILE}")
-    print(f"Expiry:      {current_expiry_date} (Tuesday)")
-    print(f"Lot Size:    {LOT_SIZE} quantity")
-    print(f"Take Profit: ₹{TAKE_PROFIT} | Stop Loss: ₹{STOP_LOSS} | Trail: ₹{TRAILING_STOP}")
-    print("=" * 85)
-    print("\n⏰ Bot started. Monitoring live market data...")
-    print("Press Ctrl+C to stop.\n")
+def render_startup_banner(e):
+    """Render startup banner"""
+    return "\n".join([
+        "\n" + "=" * 85,
+        "🚀 NIFTY 50 OPTIONS INTRADAY TRADING BOT",
+        "=" * 85,
+        "Strategy:    Day's Open + VWAP + RSI + OI Confirmation",
+        "Timeframe:   5-Minute Candles (1-min resampled)",
+        "Data Source: Live from NSE via Upstox API",
+        "Target:      75-82% Win Rate | 4-6 Signals/Day",
+        f"Log File:    {e['csv_file']} | Events: {e['event_file']} | Chain: {e['chain_file']}",
+        f"Strategies:  {', '.join(e['strategies'])}",
+        f"Expiry:      {e['expiry']} (Tuesday)",
+        f"Lot Size:    {e['lot_size']} quantity",
+        f"Take Profit: ₹{e['take_profit']} | Stop Loss: ₹{e['stop_loss']} | Trail: ₹{e['trailing_stop']}",
+        "=" * 85,
+        "\n⏰ Bot started. Monitoring live market data...",
+        "Press Ctrl+C to stop.\n"
+    ])
 
 
 
-def print_market_snapshot(spot, day_open, vwap, rsi, oi_trend, oi_ce, oi_pe):
-    """Display market state"""
-    print(f"\n📊 MARKET SNAPSHOT")
-    print("-" * 85)
-    print(f"  Spot Price:    {spot:8.2f}  |  Day's Open:   {day_open:8.2f}  {get_arrow(spot, day_open)}")
-    print(f"  VWAP:          {vwap:8.2f}  |  Position:     {'ABOVE ✅' if spot > vwap else 'BELOW ❌'}")
-    print(f"  RSI:           {rsi:8.2f}  |  Momentum:     {get_rsi_label(rsi)}")
-    print(f"  OI Trend:      {oi_trend:>8}  |  CE OI: {oi_ce:,} | PE OI: {oi_pe:,}")
+def render_tick(e):
+    """Render iteration header"""
+    return f"\n{'=' * 85}\n⏰ [{e['time']}] Iteration #{e['iteration']}\n{'=' * 85}"
 
 
 
-def print_signal_evaluation(conditions):
-    """Display signal evaluation"""
-    print(f"\n🔍 SIGNAL EVALUATION (All ✅ required for trade)")
-    print("-" * 85)
+def render_market_snapshot(e):
+    """Render market state"""
+    spot, day_open, vwap, rsi = e["spot"], e["day_open"], e["vwap"], e["rsi"]
+    return "\n".join([
+        f"\n📊 MARKET SNAPSHOT",
+        "-" * 85,
+        f"  Spot Price:    {spot:8.2f}  |  Day's Open:   {day_open:8.2f}  {get_arrow(spot, day_open)}",
+        f"  VWAP:          {vwap:8.2f}  |  Position:     {'ABOVE ✅' if spot > vwap else 'BELOW ❌'}",
+        f"  RSI:           {rsi:8.2f}  |  Momentum:     {get_rsi_label(rsi)}",
+        f"  OI Trend:      {e['oi_trend']:>8}  |  CE OI: {e['oi_ce']:,} | PE OI: {e['oi_pe']:,}"
+    ])
+
+
+
+CONDITION_LABELS = {
+    "price_above_open": "Open", "price_above_vwap": "VWAP", "rsi_bullish": "RSI>60", "oi_bullish": "OI-Bull",
+    "price_below_open": "Open", "price_below_vwap": "VWAP", "rsi_bearish": "RSI<40", "oi_bearish": "OI-Bear"
+}
+SIDE_LABELS = {"CE": "CALL:", "PE": "PUT: "}
+
+
+
+def render_signal_evaluation(e):
+    """Render signal evaluation"""
+    lines = [
+        f"\n🔍 SIGNAL EVALUATION [{e['strategy']}] (All ✅ required for trade)",
+        "-" * 85
+    ]
     
-    ce = conditions["CE"]
-    pe = conditions["PE"]
-    
-    ce_result = "🔔 TRIGGER!" if all(ce.values()) else "❌ NO"
-    pe_result = "🔔 TRIGGER!" if all(pe.values()) else "❌ NO"
-    
-    print(f"  CALL: {'✅' if ce['price_above_open'] else '❌'} Open  "
-          f"{'✅' if ce['price_above_vwap'] else '❌'} VWAP  "
-          f"{'✅' if ce['rsi_bullish'] else '❌'} RSI>60  "
-          f"{'✅' if ce['oi_bullish'] else '❌'} OI-Bull  →  {ce_result}")
-    
-    print(f"  PUT:  {'✅' if pe['price_below_open'] else '❌'} Open  "
-          f"{'✅' if pe['price_below_vwap'] else '❌'} VWAP  "
-          f"{'✅' if pe['rsi_bearish'] else '❌'} RSI<40  "
-          f"{'✅' if pe['oi_bearish'] else '❌'} OI-Bear  →  {pe_result}")
-
-
-
-def print_trade_alert(timestamp, signal, strike, premium, spot):
-    """Print trade alert"""
-    print(f"\n{'=' * 85}")
-    print(f"🔔 TRADE SIGNAL GENERATED!")
-    print(f"{'=' * 85}")
-    print(f"  Time:        {timestamp}")
-    print(f"  Action:      {signal}")
-    print(f"  Strike:      {strike}")
-    print(f"  Premium:     ₹{premium:.2f}")
-    print(f"  Lot Size:    {LOT_SIZE}")
-    print(f"  Investment:  ₹{premium * LOT_SIZE:.2f}")
-    print(f"  Spot:        {spot:.2f}")
-    print(f"  Expiry:      {current_expiry_date}")
-    print(f"  CSV Logged:  ✅")
-    print("=" * 85)
+    for side, checks in e["conditions"].items():
+        marks = "  ".join(f"{'✅' if ok else '❌'} {CONDITION_LABELS.get(name, name)}" for name, ok in checks.items())
+        result = "🔔 TRIGGER!" if all(checks.values()) else "❌ NO"
+        lines.append(f"  {SIDE_LABELS.get(side, side + ':')} {marks}  →  {result}")
+    
+    return "\n".join(lines)
+
+
+
+def render_trade_alert(e):
+    """Render trade alert"""
+    return "\n".join([
+        f"\n{'=' * 85}",
+        f"🔔 TRADE SIGNAL GENERATED!",
+        "=" * 85,
+        f"  Time:        {e['timestamp']}",
+        f"  Strategy:    {e['strategy']}",
+        f"  Action:      {e['signal']}",
+        f"  Strike:      {e['strike']}",
+        f"  Premium:     ₹{e['premium']:.2f}",
+        f"  Lot Size:    {e['lot_size']}",
+        f"  Investment:  ₹{e['premium'] * e['lot_size']:.2f}",
+        f"  Spot:        {e['spot']:.2f}",
+        f"  Expiry:      {e['expiry']}",
+        f"  CSV Logged:  ✅",
+        "=" * 85
+    ])
+
+
+
+def render_position_status(e):
+    """Render open position monitoring"""
+    lines = [
+        f"\n💼 OPEN POSITION [{e['strategy']}]: {e['signal']} {e['strike']}",
+        f"   Entry: ₹{e['entry_premium']:.2f} | Lot: {e['lot_size']}"
+    ]
+    
+    if e.get("premium") is not None:
+        lines.append(f"   Current: ₹{e['premium']:.2f} | Diff: ₹{e['premium_diff']:.2f}")
+        lines.append(f"   P&L: ₹{e['pnl']:.2f} (₹{e['premium_diff']:.2f} × {e['lot_size']})")
+    
+    if e.get("trailing_stop") is not None:
+        lines.append(f"   🎯 Trailing Stop: ₹{e['trailing_stop']:.2f}")
+    
+    return "\n".join(lines)
+
+
+
+def render_position_closed(e):
+    """Render position exit"""
+    if e["exit_reason"] == "MARKET CLOSE":
+        return (f"\n💼 CLOSING POSITION AT MARKET CLOSE [{e['strategy']}]\n"
+                f"   P&L: ₹{e['pnl']:.2f} (₹{e['premium_diff']:.2f} × {e['lot_size']})")
+    
+    return "\n".join([
+        f"\n{'=' * 85}",
+        f"🔔 POSITION CLOSED [{e['strategy']}]: {e['exit_reason']}",
+        "=" * 85,
+        f"  Entry:       ₹{e['entry_premium']:.2f}",
+        f"  Exit:        ₹{e['exit_premium']:.2f}",
+        f"  Premium Diff: ₹{e['premium_diff']:.2f}",
+        f"  Total P&L:   ₹{e['pnl']:.2f} (₹{e['premium_diff']:.2f} × {e['lot_size']})",
+        "=" * 85
+    ])
+
+
+
+def render_stopped(e):
+    """Render shutdown message"""
+    return "\n".join([
+        f"\n\n{'=' * 85}",
+        "⏹  BOT STOPPED BY USER",
+        "=" * 85,
+        f"All signals saved to: {e['csv_file']}",
+        f"All events saved to:  {e['event_file']}",
+        "=" * 85,
+        "\n✅ Thank you for using Nifty Options Trading Bot!\n"
+    ])
+
+
+
+# Event type -> (level, console renderer or format string, throttled on console)
+EVENT_TYPES = {
+    "init":               ("INFO",  "\n📥 Initializing...", False),
+    "instruments_failed": ("ERROR", "❌ Failed to fetch option instruments", False),
+    "instruments_loaded": ("INFO",  "✅ Loaded {count} instruments ({elapsed_ms:.0f} ms after start)", False),
+    "startup":            ("INFO",  render_startup_banner, False),
+    "tick":               ("INFO",  render_tick, True),
+    "market_waiting":     ("INFO",  "⏸  Market not open yet (Opens 9:15 AM)", True),
+    "market_closed":      ("INFO",  "⏸  Market Closed (Closes 3:30 PM)", True),
+    "fetching":           ("DEBUG", "\n📥 Fetching live data from NSE...", False),
+    "candles_fetched":    ("DEBUG", "  ✅ Fetched {raw} 1-min → {bars} 5-min candles", False),
+    "candles_failed":     ("WARN",  "\n❌ Failed to fetch candles. Retrying in 60s...", False),
+    "indicators":         ("DEBUG", "  ✅ Spot: {spot:.2f} | VWAP: {vwap:.2f} | RSI: {rsi:.2f}", False),
+    "oi_fetched":         ("DEBUG", "  ✅ Live OI: CE={oi_ce:,} | PE={oi_pe:,} → {oi_trend}", False),
+    "market_snapshot":    ("INFO",  render_market_snapshot, True),
+    "cooldown":           ("INFO",  "\n⏳ COOLDOWN ACTIVE [{strategy}]: {remaining}s remaining until next signal", True),
+    "signal_evaluation":  ("INFO",  render_signal_evaluation, True),
+    "no_signal":          ("DEBUG", "\n⏸  NO SIGNAL [{strategy}] - Waiting for all conditions to align...", False),
+    "trade_alert":        ("INFO",  render_trade_alert, False),
+    "signal_unavailable": ("WARN",  "\n⚠️  Signal generated [{strategy}] but strike/premium unavailable", False),
+    "position_status":    ("INFO",  render_position_status, True),
+    "trailing_activated": ("INFO",  "  🎯 Take Profit reached! Trailing stop: ₹{trailing_stop:.2f}", False),
+    "trailing_updated":   ("INFO",  "  📈 Trailing stop updated: ₹{trailing_stop:.2f}", False),
+    "position_closed":    ("INFO",  render_position_closed, False),
+    "archive_error":      ("WARN",  "  ⚠️  Chain archive failed: {error}", False),
+    "discord_sent":       ("DEBUG", "  ✅ Discord alert sent", False),
+    "first_decision":     ("INFO",  "\n⚡ First decision {elapsed_ms:.0f} ms after start "
+                                    "(including {premarket_wait_s:.0f}s pre-market wait)", False),
+    "next_check":         ("DEBUG", "\n⏱  Next check in 60 seconds...", False),
+    "stopped":            ("INFO",  render_stopped, False),
+    "error":              ("ERROR", "\n\n❌ CRITICAL ERROR: {error}", False)
+}
 
 
 
 # ==================== LOGGING ====================
 
 
-def log_trade_to_csv(timestamp, signal, strike, premium, spot, rsi, vwap, day_open, oi_trend, exit_reason=None, pnl=None, premium_diff=None):
+def log_trade_to_csv(timestamp, signal, strike, premium, spot, rsi, vwap, day_open, oi_trend, exit_reason=None, pnl=None, premium_diff=None, strategy=""):
     """Log trade to CSV with UTF-8 encoding"""
     with open(CSV_FILE, "a", newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
@@ -570,17 +1323,328 @@ def log_trade_to_csv(timestamp, signal, strike, premium, spot, rsi, vwap, day_op
             round(spot, 2), round(rsi, 2), round(vwap, 2), round(day_open, 2), oi_trend,
             exit_reason if exit_reason else "",
             round(pnl, 2) if pnl else "",
-            round(premium_diff, 2) if premium_diff else ""
+            round(premium_diff, 2) if premium_diff else "",
+            strategy
         ])
 
 
 
+# ==================== TRADE ANALYTICS ====================
+
+
+def load_trade_log(path):
+    """Read one session CSV into columns: time, signal, exit reason, realized P&L (EXIT rows), strategy"""
+    columns = ([], [], [], [], [])
+    
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return columns
+        
+        strategy_col = header.index("Strategy") if "Strategy" in header else None
+        
+        for row in reader:
+            if len(row) < 10:
+                continue
+            columns[0].append(row[0])
+            columns[1].append(row[1])
+            columns[2].append(row[9])
+            columns[3].append(float(row[10]) if len(row) > 10 and row[10] else 0.0)
+            columns[4].append(row[strategy_col] if strategy_col is not None and len(row) > strategy_col else "")
+    
+    return columns
+
+
+
+def find_trade_logs(targets):
+    """Expand files, directories and glob patterns into a sorted list of CSV logs"""
+    paths = set()
+    
+    for target in targets:
+        if os.path.isdir(target):
+            paths.update(glob.glob(os.path.join(target, "**", "*.csv"), recursive=True))
+        else:
+            paths.update(p for p in glob.glob(target, recursive=True) if os.path.isfile(p))
+    
+    return sorted(paths)
+
+
+
+def load_trade_logs(paths, workers=None):
+    """Load session logs in parallel into columnar NumPy arrays"""
+    if len(paths) > 1:
+        workers = workers or min(len(paths), os.cpu_count() or 1)
+        chunksize = max(1, len(paths) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            loaded = list(pool.map(load_trade_log, paths, chunksize=chunksize))
+    else:
+        loaded = [load_trade_log(p) for p in paths]
+    
+    counts = [len(cols[0]) for cols in loaded]
+    
+    def column(i):
+        return [value for cols in loaded for value in cols[i]]
+    
+    return {
+        "file": np.repeat(np.arange(len(loaded)), counts),
+        "row": np.concatenate([np.arange(n) for n in counts]) if counts else np.zeros(0, dtype=int),
+        "time": np.array(column(0), dtype="datetime64[s]"),
+        "signal": np.array(column(1), dtype=str),
+        "exit_reason": np.array(column(2), dtype=str),
+        "pnl": np.array(column(3), dtype=float),
+        "strategy": np.array(column(4), dtype=str)
+    }
+
+
+
+def pair_trades(log):
+    """Pair each entry with the EXIT row that follows it in the same file and strategy"""
+    strategy_names, strategy_codes = np.unique(log["strategy"], return_inverse=True)
+    order = np.lexsort((log["row"], strategy_codes, log["file"]))
+    
+    group = log["file"][order] * len(strategy_names) + strategy_codes[order]
+    is_exit = np.char.startswith(log["signal"][order], "EXIT")
+    
+    paired = ~is_exit[:-1] & is_exit[1:] & (group[:-1] == group[1:])
+    entries = order[:-1][paired]
+    exits = order[1:][paired]
+    
+    return {
+        "strategy": log["strategy"][entries],
+        "signal": log["signal"][entries],
+        "entry_time": log["time"][entries],
+        "exit_time": log["time"][exits],
+        "pnl": log["pnl"][exits],
+        "holding_minutes": (log["time"][exits] - log["time"][entries]).astype("timedelta64[s]").astype(float) / 60,
+        "exit_reason": np.array([r.partition(" (")[0] for r in log["exit_reason"][exits]], dtype=str),
+        "open": int((~is_exit).sum() - paired.sum())
+    }
+
+
+
+def summarize_trades(pnl, holding_minutes):
+    """Realized P&L statistics for a set of closed trades (ordered by exit time)"""
+    equity = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+    wins = pnl > 0
+    
+    return {
+        "trades": len(pnl),
+        "pnl": pnl.sum(),
+        "win_rate": wins.mean() * 100,
+        "expectancy": pnl.mean(),
+        "avg_win": pnl[wins].mean() if wins.any() else 0.0,
+        "avg_loss": pnl[~wins].mean() if (~wins).any() else 0.0,
+        "max_drawdown": (peak - equity).max(),
+        "avg_hold": holding_minutes.mean(),
+        "max_hold": holding_minutes.max()
+    }
+
+
+
+def analyze_trade_logs(targets):
+    """Report P&L, win rate, expectancy, drawdown, holding time and exit reasons across session logs"""
+    started = time.perf_counter()
+    paths = find_trade_logs(targets)
+    
+    if not paths:
+        print(f"❌ No trade logs found in: {' '.join(targets)}")
+        return
+    
+    trades = pair_trades(load_trade_logs(paths))
+    
+    by_exit = np.argsort(trades["exit_time"], kind="stable")
+    trades = {k: v[by_exit] if isinstance(v, np.ndarray) else v for k, v in trades.items()}
+    
+    print("\n" + "=" * 85)
+    print("📊 TRADE ANALYTICS")
+    print("=" * 85)
+    print(f"Logs:        {len(paths)} file(s)")
+    print(f"Closed:      {len(trades['pnl'])} trade(s) | Unmatched entries: {trades['open']}")
+    
+    if len(trades["pnl"]) == 0:
+        print("=" * 85)
+        return
+    
+    print(f"Period:      {trades['entry_time'].min()} → {trades['exit_time'].max()}")
+    
+    groups = [("ALL", np.ones(len(trades["pnl"]), dtype=bool))]
+    strategy_names = np.unique(trades["strategy"])
+    if len(strategy_names) > 1:
+        groups += [(name or "(unnamed)", trades["strategy"] == name) for name in strategy_names]
+    
+    for name, mask in groups:
+        stats = summarize_trades(trades["pnl"][mask], trades["holding_minutes"][mask])
+        print(f"\n💼 {name}")
+        print("-" * 85)
+        print(f"  Trades:        {stats['trades']:8d}  |  Win Rate:     {stats['win_rate']:7.2f}%")
+        print(f"  Realized P&L:  ₹{stats['pnl']:,.2f}  |  Expectancy:   ₹{stats['expectancy']:,.2f}")
+        print(f"  Avg Win:       ₹{stats['avg_win']:,.2f}  |  Avg Loss:     ₹{stats['avg_loss']:,.2f}")
+        print(f"  Max Drawdown:  ₹{stats['max_drawdown']:,.2f}")
+        print(f"  Holding Time:  avg {stats['avg_hold']:.1f} min | max {stats['max_hold']:.1f} min")
+    
+    reasons, reason_codes, reason_counts = np.unique(trades["exit_reason"], return_inverse=True, return_counts=True)
+    reason_pnl = np.bincount(reason_codes, weights=trades["pnl"], minlength=len(reasons))
+    
+    print(f"\n🔔 EXIT REASONS")
+    print("-" * 85)
+    for reason, count, pnl in zip(reasons, reason_counts, reason_pnl):
+        print(f"  {reason or '(none)':<16} {count:6d} trade(s)  |  P&L: ₹{pnl:,.2f}")
+    
+    print("=" * 85)
+    print(f"⏱  Analyzed in {time.perf_counter() - started:.2f}s\n")
+
+
+
+# ==================== TRADE MANAGEMENT ====================
+
+
+def close_position(strategy, snapshot, exit_reason, current_premium, pnl, premium_diff):
+    """Log, record and alert a position exit"""
+    slot = strategy.position
+    signal_type = position_book.signal_type[slot]
+    strike = position_book.strike[slot]
+    entry_premium = float(position_book.entry_premium[slot])
+    pnl, premium_diff = float(pnl), float(premium_diff)
+    
+    log_event("position_closed", strategy=strategy.name, signal=signal_type, strike=strike,
+              exit_reason=exit_reason, entry_premium=entry_premium, exit_premium=current_premium,
+              premium_diff=premium_diff, pnl=pnl, lot_size=LOT_SIZE)
+    
+    log_trade_to_csv(snapshot.timestamp, f"EXIT {signal_type}", strike,
+                     current_premium, 0, 0, 0, 0, "", exit_reason, pnl, premium_diff, strategy.name)
+    
+    if exit_reason == "MARKET CLOSE":
+        title, color = "🔔 Position Closed - Market Close", 0xffff00
+    else:
+        title, color = f"🔔 {exit_reason}", 0x00ff00 if pnl > 0 else 0xff0000
+    
+    send_discord_alert(
+        title,
+        f"**{signal_type}** | Strike: {strike} | {strategy.name}",
+        color,
+        [
+            {"name": "Entry", "value": f"₹{entry_premium:.2f}", "inline": True},
+            {"name": "Exit", "value": f"₹{current_premium:.2f}", "inline": True},
+            {"name": "P&L", "value": f"₹{pnl:.2f}", "inline": False}
+        ]
+    )
+    
+    position_book.close(slot)
+    strategy.position = None
+
+
+
+def close_positions_at_market_close(snapshot):
+    """Square off every open position"""
+    owners = {s.position: s for s in STRATEGIES if s.position is not None}
+    if not owners:
+        return
+    
+    quotes = snapshot.premiums([position_book.instrument_key[slot] for slot in owners])
+    premiums = {slot: quotes[position_book.instrument_key[slot]] for slot in owners}
+    pnl, premium_diff = position_book.calculate_pnl(position_book.premium_vector(premiums))
+    
+    for slot, strategy in owners.items():
+        if premiums[slot]:
+            close_position(strategy, snapshot, "MARKET CLOSE", premiums[slot], pnl[slot], premium_diff[slot])
+
+
+
+def monitor_positions(snapshot):
+    """Check every open position for TP/SL/trailing exits in one pass over the position book"""
+    owners = {s.position: s for s in STRATEGIES if s.position is not None}
+    if not owners:
+        return
+    
+    quotes = snapshot.premiums([position_book.instrument_key[slot] for slot in owners])
+    premiums = {slot: quotes[position_book.instrument_key[slot]] for slot in owners}
+    trailing_before = np.where(position_book.trailing_active, position_book.trailing_stop, np.nan)
+    
+    exit_codes, pnl, premium_diff, activated, updated = position_book.evaluate(position_book.premium_vector(premiums))
+    
+    for slot, strategy in owners.items():
+        status = dict(strategy=strategy.name, signal=position_book.signal_type[slot],
+                      strike=position_book.strike[slot], entry_premium=float(position_book.entry_premium[slot]),
+                      lot_size=LOT_SIZE)
+        
+        if not premiums[slot]:
+            log_event("position_status", **status)
+            continue
+        
+        log_event("position_status", premium=premiums[slot], premium_diff=float(premium_diff[slot]),
+                  pnl=float(pnl[slot]),
+                  trailing_stop=None if np.isnan(trailing_before[slot]) else float(trailing_before[slot]),
+                  **status)
+        
+        if activated[slot]:
+            log_event("trailing_activated", strategy=strategy.name, strike=position_book.strike[slot],
+                      trailing_stop=float(position_book.trailing_stop[slot]))
+        elif updated[slot]:
+            log_event("trailing_updated", strategy=strategy.name, strike=position_book.strike[slot],
+                      trailing_stop=float(position_book.trailing_stop[slot]))
+        
+        if exit_codes[slot] != EXIT_NONE:
+            exit_reason = format_exit_reason(exit_codes[slot], pnl[slot])
+            close_position(strategy, snapshot, exit_reason, premiums[slot], pnl[slot], premium_diff[slot])
+            strategy.last_signal_time = snapshot.now
+
+
+
+def evaluate_strategy(strategy, snapshot):
+    """Run a flat strategy's decision logic on the shared snapshot and enter on a signal"""
+    remaining = strategy.cooldown_remaining(snapshot.now)
+    if remaining > 0:
+        log_event("cooldown", strategy=strategy.name, remaining=remaining)
+        return
+    
+    signal, conditions = strategy.evaluate(snapshot)
+    
+    log_event("signal_evaluation", strategy=strategy.name, signal=signal, conditions=conditions)
+    
+    if not signal:
+        log_event("no_signal", strategy=strategy.name)
+        return
+    
+    option_type = "CE" if signal == "BUY CE" else "PE"
+    
+    strike, premium, instrument_key = find_atm_strike_and_premium(snapshot.spot, option_type, snapshot.premium)
+    
+    if not (strike and premium and instrument_key):
+        log_event("signal_unavailable", strategy=strategy.name, signal=signal, strike=strike)
+        return
+    
+    spot = snapshot.spot
+    
+    log_event("trade_alert", strategy=strategy.name, timestamp=snapshot.timestamp, signal=signal, strike=strike,
+              premium=premium, spot=spot, lot_size=LOT_SIZE, expiry=current_expiry_date)
+    
+    strategy.position = position_book.open(signal, strike, premium, instrument_key, snapshot.timestamp)
+    
+    log_trade_to_csv(snapshot.timestamp, signal, strike, premium, spot, snapshot.rsi, snapshot.vwap,
+                     snapshot.day_open, snapshot.oi_trend, strategy=strategy.name)
+    
+    send_discord_alert(
+        f"🚀 NEW SIGNAL - {signal}",
+        f"Strike: {strike} | Lot: {LOT_SIZE} | {strategy.name}",
+        0x00ff00,
+        [
+            {"name": "Premium", "value": f"₹{premium:.2f}", "inline": True},
+            {"name": "Spot", "value": f"{spot:.2f}", "inline": True},
+            {"name": "Investment", "value": f"₹{premium * LOT_SIZE:.2f}", "inline": True}
+        ]
+    )
+    
+    strategy.last_signal_time = snapshot.now
+
+
+
 # ==================== MAIN LOOP ====================
 
 
 def main():
     """Main trading bot loop"""
-    global last_signal_time, open_position
     
     # Initialize CSV with UTF-8 encoding
     with open(CSV_FILE, "w", newline='', encoding='utf-8') as f:
@@ -588,211 +1652,120 @@ def main():
         writer.writerow([
             "Time", "Signal", "Strike", "Premium",
             "Spot", "RSI", "VWAP", "Day_Open", "OI_Trend",
-            "Exit_Reason", "PnL", "Premium_Diff"
+            "Exit_Reason", "PnL", "Premium_Diff", "Strategy"
         ])
     
-    # Get option instruments
-    print("\n📥 Initializing...")
-    option_instruments = get_option_instruments()
-    
-    if len(option_instruments) == 0:
-        print("❌ Failed to fetch option instruments")
-        return
-    
-    print(f"✅ Loaded {len(option_instruments)} instruments")
-    
-    print_startup_banner()
-    
-    iteration = 0
+    event_log.start()
     
     try:
+        chain_archive.open()
+        
+        # Get option instruments - overlapped with the first candle fetch
+        log_event("init")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            instruments_future = pool.submit(get_option_instruments)
+            candles_future = pool.submit(fetch_live_spot_candles, NIFTY_SYMBOL)
+            option_instruments = instruments_future.result()
+            prefetched_bars = candles_future.result()
+        
+        if len(option_instruments) == 0:
+            log_event("instruments_failed")
+            return
+        
+        log_event("instruments_loaded", count=len(option_instruments),
+                  elapsed_ms=(time.perf_counter() - STARTED_AT) * 1000)
+        
+        # Warm NumPy off the trading thread so the first position entry doesn't pay for the import
+        threading.Thread(target=np.warm, name="numpy-warmup", daemon=True).start()
+        
+        log_event("startup", csv_file=CSV_FILE, event_file=EVENT_LOG_FILE, chain_file=CHAIN_ARCHIVE_FILE,
+                  expiry=current_expiry_date, strategies=[s.name for s in STRATEGIES], lot_size=LOT_SIZE,
+                  take_profit=TAKE_PROFIT, stop_loss=STOP_LOSS, trailing_stop=TRAILING_STOP)
+        
+        iteration = 0
+        first_decision = True
+        loop_started = time.perf_counter()
+        
         while True:
             iteration += 1
+            tick_started = time.perf_counter()
             now = dt.datetime.now()
+            snapshot = MarketSnapshot(now)
             
-            print(f"\n{'=' * 85}")
-            print(f"⏰ [{now.strftime('%d-%b-%Y %H:%M:%S')}] Iteration #{iteration}")
-            print("=" * 85)
+            log_event("tick", iteration=iteration, time=now.strftime('%d-%b-%Y %H:%M:%S'))
             
             # Market hours
             if now.hour < 9 or (now.hour == 9 and now.minute < 15):
-                print("⏸  Market not open yet (Opens 9:15 AM)")
+                log_event("market_waiting")
                 time.sleep(60)
                 continue
             
             if (now.hour == 15 and now.minute > 30) or now.hour > 15:
-                print("⏸  Market Closed (Closes 3:30 PM)")
-                
-                # Close position at market close
-                if open_position:
-                    current_premium = get_current_premium(open_position.instrument_key)
-                    if current_premium:
-                        pnl, premium_diff = open_position.calculate_pnl(current_premium)
-                        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
-                        
-                        print(f"\n💼 CLOSING POSITION AT MARKET CLOSE")
-                        print(f"   P&L: ₹{pnl:.2f} (₹{premium_diff:.2f} × {LOT_SIZE})")
-                        
-                        log_trade_to_csv(timestamp, f"EXIT {open_position.signal_type}", open_position.strike, 
-                                       current_premium, 0, 0, 0, 0, "", "MARKET CLOSE", pnl, premium_diff)
-                        
-                        send_discord_alert(
-                            "🔔 Position Closed - Market Close",
-                            f"**{open_position.signal_type}** | Strike: {open_position.strike}",
-                            0xffff00,
-                            [
-                                {"name": "Entry", "value": f"₹{open_position.entry_premium:.2f}", "inline": True},
-                                {"name": "Exit", "value": f"₹{current_premium:.2f}", "inline": True},
-                                {"name": "P&L", "value": f"₹{pnl:.2f}", "inline": False}
-                            ]
-                        )
-                        
-                        open_position = None
-                
-                time.sleep(60)
-                continue
-            
-            print("\n📥 Fetching live data from NSE...")
-            
-            # Monitor open position
-            if open_position:
-                print(f"\n💼 OPEN POSITION: {open_position.signal_type} {open_position.strike}")
-                print(f"   Entry: ₹{open_position.entry_premium:.2f} | Lot: {LOT_SIZE}")
+                log_event("market_closed")
                 
-                current_premium = get_current_premium(open_position.instrument_key)
-                
-                if current_premium:
-                    pnl, premium_diff = open_position.calculate_pnl(current_premium)
-                    
-                    print(f"   Current: ₹{current_premium:.2f} | Diff: ₹{premium_diff:.2f}")
-                    print(f"   P&L: ₹{pnl:.2f} (₹{premium_diff:.2f} × {LOT_SIZE})")
-                    
-                    if open_position.trailing_stop_active:
-                        print(f"   🎯 Trailing Stop: ₹{open_position.trailing_stop_price:.2f}")
-                    
-                    should_exit, exit_reason, final_pnl, final_premium_diff = open_position.check_exit(current_premium)
-                    
-                    if should_exit:
-                        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
-                        
-                        print(f"\n{'='*85}")
-                        print(f"🔔 POSITION CLOSED: {exit_reason}")
-                        print(f"{'='*85}")
-                        print(f"  Entry:       ₹{open_position.entry_premium:.2f}")
-                        print(f"  Exit:        ₹{current_premium:.2f}")
-                        print(f"  Premium Diff: ₹{final_premium_diff:.2f}")
-                        print(f"  Total P&L:   ₹{final_pnl:.2f} (₹{final_premium_diff:.2f} × {LOT_SIZE})")
-                        print("=" * 85)
-                        
-                        log_trade_to_csv(timestamp, f"EXIT {open_position.signal_type}", open_position.strike,
-                                       current_premium, 0, 0, 0, 0, "", exit_reason, final_pnl, final_premium_diff)
-                        
-                        color = 0x00ff00 if final_pnl > 0 else 0xff0000
-                        send_discord_alert(
-                            f"🔔 {exit_reason}",
-                            f"**{open_position.signal_type}** | Strike: {open_position.strike}",
-                            color,
-                            [
-                                {"name": "Entry", "value": f"₹{open_position.entry_premium:.2f}", "inline": True},
-                                {"name": "Exit", "value": f"₹{current_premium:.2f}", "inline": True},
-                                {"name": "P&L", "value": f"₹{final_pnl:.2f}", "inline": False}
-                            ]
-                        )
-                        
-                        open_position = None
-                        last_signal_time = now
+                # Close positions at market close
+                close_positions_at_market_close(snapshot)
                 
                 time.sleep(60)
                 continue
             
-            # Look for new signals
-            df = fetch_live_spot_candles(NIFTY_SYMBOL)
-            if df is None or len(df) == 0:
-                print("\n❌ Failed to fetch candles. Retrying in 60s...")
-                time.sleep(60)
-                continue
-            
-            df = calculate_vwap_rsi(df)
-            
-            latest = df.iloc[-1]
-            spot = latest["close"]
-            day_open = df.iloc[0]["open"]
-            vwap = latest["VWAP"]
-            rsi = latest["RSI"]
+            log_event("fetching")
             
-            print(f"  ✅ Spot: {spot:.2f} | VWAP: {vwap:.2f} | RSI: {rsi:.2f}")
+            # Market data is fetched once per tick - before monitoring, so open positions
+            # are priced from the same chain quotes the flat strategies evaluate on
+            bars = prefetched_bars if iteration == 1 else None
+            attempted = any(s.position is None for s in STRATEGIES)
+            if attempted:
+                snapshot.load(option_instruments, bars)
             
-            oi_trend, oi_ce, oi_pe = get_live_oi_from_quotes(option_instruments)
-            
-            if oi_trend is None:
-                oi_trend = "Unknown"
-                oi_ce, oi_pe = 0, 0
-            else:
-                print(f"  ✅ Live OI: CE={oi_ce:,} | PE={oi_pe:,} → {oi_trend}")
+            # Monitor open positions
+            monitor_positions(snapshot)
             
-            print_market_snapshot(spot, day_open, vwap, rsi, oi_trend, oi_ce, oi_pe)
+            # Look for new signals
+            flat = [s for s in STRATEGIES if s.position is None]
             
-            if last_signal_time:
-                elapsed = (now - last_signal_time).seconds
-                if elapsed < SIGNAL_COOLDOWN:
-                    remaining = SIGNAL_COOLDOWN - elapsed
-                    print(f"\n⏳ COOLDOWN ACTIVE: {remaining}s remaining until next signal")
+            if flat:
+                if not attempted:
+                    snapshot.load(option_instruments, bars)
+                
+                if not snapshot.loaded:
+                    log_event("candles_failed")
                     time.sleep(60)
                     continue
-            
-            signal, conditions = check_signal_conditions(spot, day_open, vwap, rsi, oi_trend)
-            
-            print_signal_evaluation(conditions)
-            
-            if signal:
-                option_type = "CE" if signal == "BUY CE" else "PE"
                 
-                strike, premium, instrument_key = find_atm_strike_and_premium(spot, option_type)
+                log_event("market_snapshot", spot=snapshot.spot, day_open=snapshot.day_open, vwap=snapshot.vwap,
+                          rsi=snapshot.rsi, oi_trend=snapshot.oi_trend, oi_ce=snapshot.oi_ce, oi_pe=snapshot.oi_pe)
                 
-                if strike and premium and instrument_key:
-                    timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    print_trade_alert(timestamp, signal, strike, premium, spot)
-                    
-                    open_position = Position(signal, strike, premium, instrument_key, timestamp)
-                    
-                    log_trade_to_csv(timestamp, signal, strike, premium, spot, rsi, vwap, day_open, oi_trend)
-                    
-                    send_discord_alert(
-                        f"🚀 NEW SIGNAL - {signal}",
-                        f"Strike: {strike} | Lot: {LOT_SIZE}",
-                        0x00ff00,
-                        [
-                            {"name": "Premium", "value": f"₹{premium:.2f}", "inline": True},
-                            {"name": "Spot", "value": f"{spot:.2f}", "inline": True},
-                            {"name": "Investment", "value": f"₹{premium * LOT_SIZE:.2f}", "inline": True}
-                        ]
-                    )
-                    
-                    last_signal_time = now
-                else:
-                    print(f"\n⚠️  Signal generated but strike/premium unavailable")
-            else:
-                print(f"\n⏸  NO SIGNAL - Waiting for all conditions to align...")
+                for strategy in flat:
+                    evaluate_strategy(strategy, snapshot)
+            
+            if first_decision:
+                first_decision = False
+                log_event("first_decision", elapsed_ms=(time.perf_counter() - STARTED_AT) * 1000,
+                          premarket_wait_s=tick_started - loop_started)
             
-            print(f"\n⏱  Next check in 60 seconds...")
+            log_event("next_check")
             time.sleep(60)
     
     except KeyboardInterrupt:
-        print(f"\n\n{'=' * 85}")
-        print("⏹  BOT STOPPED BY USER")
-        print(f"{'=' * 85}")
-        print(f"All signals saved to: {CSV_FILE}")
-        print("=" * 85)
-        print("\n✅ Thank you for using Nifty Options Trading Bot!\n")
+        log_event("stopped", csv_file=CSV_FILE, event_file=EVENT_LOG_FILE)
     
     except Exception as e:
-        print(f"\n\n❌ CRITICAL ERROR: {e}")
+        log_event("error", error=str(e))
+    
+    finally:
+        chain_archive.close()
+        event_log.close()
 
 
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "analyze":
+        analyze_trade_logs(sys.argv[2:] or [CSV_FILE])
+    elif len(sys.argv) > 1 and sys.argv[1] == "check-exits":
+        sys.exit(0 if check_backtest_exits() else 1)
+    else:
+        main()
 
 
 